@@ -15,17 +15,69 @@ Content deployed includes:
 """
 
 import argparse
-import json
+import itertools
+import os
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, Union
 import subprocess
+import fastjsonschema
+import ijson
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from azure.identity import DefaultAzureCredential, AzureCliCredential
 from azure.core.exceptions import ClientAuthenticationError
 
 
+# ARM provisioning states after which a deployment will not change any more
+TERMINAL_PROVISIONING_STATES = {'Succeeded', 'Failed', 'Canceled'}
+
+# Per-user cache for values that are expensive to look up through Azure CLI
+CACHE_DIR = Path.home() / ".cache" / "sentinel-deployer"
+SUBSCRIPTION_CACHE_TTL = 24 * 60 * 60  # Seconds
+
+# Optional early checks for main.bicep parameters; set to None to skip
+# validation. Parameters not listed here are passed through for ARM to check.
+PARAMS_SCHEMA: Optional[Dict[str, Any]] = {
+    "type": "object",
+    "required": ["workspaceName"],
+    "properties": {
+        "workspaceName": {"type": "string", "minLength": 1},
+        "location": {"type": "string"},
+        "workspaceSku": {"enum": ["PerGB2018", "Free", "Standalone", "PerNode", "Standard", "Premium"]},
+        "dataRetention": {"type": "integer", "minimum": 30, "maximum": 730},
+        "dailyQuotaGb": {"type": "integer"},
+        "deployAnalyticalRules": {"type": "boolean"},
+        "deployParsers": {"type": "boolean"},
+        "deployWorkbooks": {"type": "boolean"},
+        "deployHuntingQueries": {"type": "boolean"},
+        "deployWatchlists": {"type": "boolean"},
+        "tags": {"type": "object"}
+    }
+}
+
+# Compiled once at import; raises fastjsonschema.JsonSchemaException on invalid data
+_validate_parameters = fastjsonschema.compile(PARAMS_SCHEMA) if PARAMS_SCHEMA is not None else None
+
+
+def _format_json(data: Any) -> str:
+    """Pretty-print JSON for console output"""
+    return orjson.dumps(data, option=orjson.OPT_INDENT_2).decode()
+
+
+def _azure_profile_mtime() -> float:
+    """Modification time of the Azure CLI profile, 0 if there is none"""
+    azure_dir = Path(os.environ.get("AZURE_CONFIG_DIR", Path.home() / ".azure"))
+    try:
+        return (azure_dir / "azureProfile.json").stat().st_mtime
+    except OSError:
+        return 0
+
+
 class Colors:
     """ANSI color codes for terminal output"""
     CYAN = '\033[0;36m'
@@ -40,6 +92,13 @@ class AzureRestDeployer:
     
     API_VERSION_RESOURCES = "2021-04-01"
     API_VERSION_DEPLOYMENTS = "2021-04-01"
+    TOKEN_SCOPE = "https://management.azure.com/.default"
+    TOKEN_REFRESH_MARGIN = 300  # Refresh token when less than 5 minutes remain
+    REQUEST_TIMEOUT = 30  # Seconds to wait on a single HTTP response (applies to every call)
+    # Seconds between deployment polls; most content-only deployments finish
+    # within a minute, so poll early and space out later polls
+    DEPLOYMENT_POLL_SCHEDULE = (1, 2, 3, 5, 8, 13)
+    MANAGEMENT_ENDPOINT = "https://management.azure.com"
     
     def __init__(self, subscription_id: str, verbose: bool = False):
         """
@@ -51,8 +110,29 @@ class AzureRestDeployer:
         """
         self.subscription_id = subscription_id
         self.verbose = verbose
-        self.access_token = None
+        # URL pieces shared by every request
+        self._base = f"{self.MANAGEMENT_ENDPOINT}/subscriptions/{subscription_id}"
+        self._res_api = f"?api-version={self.API_VERSION_RESOURCES}"
+        self._dep_api = f"?api-version={self.API_VERSION_DEPLOYMENTS}"
         self.credential = None
+        self._token_expires_on = 0
+        self._token_credential = None  # Credential class that produced the cached token
+        # Single session so all REST calls share keep-alive connections
+        self.session = requests.Session()
+        self.session.headers["Content-Type"] = "application/json"
+        # Retry throttling and transient server errors, waiting out Retry-After
+        retry = Retry(
+            total=5,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET", "PUT", "POST"],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retry)
+        self.session.mount(self.MANAGEMENT_ENDPOINT, adapter)
+        self._token_cache_file = CACHE_DIR / "token.json"
+        self._load_cached_token()
         
     def authenticate(self) -> bool:
         """
@@ -63,19 +143,27 @@ class AzureRestDeployer:
         """
         print(f"{Colors.YELLOW}Authenticating with Azure...{Colors.NC}")
         
+        if time.time() < self._token_expires_on - self.TOKEN_REFRESH_MARGIN:
+            # Token from a previous run is still valid; the credential is only
+            # needed for refreshes, so rebuild the one that produced the token
+            if self._token_credential == AzureCliCredential.__name__:
+                self.credential = AzureCliCredential()
+            else:
+                self.credential = DefaultAzureCredential()
+            print(f"{Colors.GREEN}✓ Authenticated using cached access token{Colors.NC}")
+            return True
+        
         try:
             # Try Azure CLI credential first (most common for local development)
             try:
                 self.credential = AzureCliCredential()
-                token = self.credential.get_token("https://management.azure.com/.default")
-                self.access_token = token.token
+                self._ensure_token()
                 print(f"{Colors.GREEN}✓ Authenticated using Azure CLI credentials{Colors.NC}")
                 return True
             except ClientAuthenticationError:
                 # Fall back to DefaultAzureCredential (supports managed identity, env vars, etc.)
                 self.credential = DefaultAzureCredential()
-                token = self.credential.get_token("https://management.azure.com/.default")
-                self.access_token = token.token
+                self._ensure_token()
                 print(f"{Colors.GREEN}✓ Authenticated using default credentials{Colors.NC}")
                 return True
                 
@@ -84,13 +172,142 @@ class AzureRestDeployer:
             print(f"{Colors.RED}Please run 'az login' first or set up appropriate credentials{Colors.NC}")
             return False
     
-    def _get_headers(self) -> Dict[str, str]:
-        """Get HTTP headers with authentication token"""
+    def _ensure_token(self) -> None:
+        """Refresh the session's bearer token if it is missing or about to expire"""
+        if time.time() < self._token_expires_on - self.TOKEN_REFRESH_MARGIN:
+            return
+
+        token = self.credential.get_token(self.TOKEN_SCOPE)
+        self.session.headers["Authorization"] = f"Bearer {token.token}"
+        self._token_expires_on = token.expires_on
+        self._token_credential = type(self.credential).__name__
+        self._save_cached_token(token.token)
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Send a request on the session with a valid bearer token
+        
+        A 401 means the token was rejected before it expired (revoked, or
+        blocked by Conditional Access), so the cached token is dropped and the
+        request is retried once with a token fresh from the credential.
+        
+        Args:
+            method: HTTP method
+            url: Request URL
+            **kwargs: Passed on to requests.Session.request
+            
+        Returns:
+            requests.Response: Response to the (possibly retried) request
+        """
+        self._ensure_token()
+        response = self.session.request(method, url, **kwargs)
+        if response.status_code != 401:
+            return response
+        
+        self._discard_cached_token()
+        try:
+            self._ensure_token()
+        except ClientAuthenticationError:
+            return response
+        return self.session.request(method, url, **kwargs)
+    
+    @staticmethod
+    def _token_identity() -> Dict[str, Optional[str]]:
+        """
+        Identify who a cached token may be reused by
+        
+        Service principals and user-assigned managed identities are selected
+        through these variables; Azure CLI sign-ins are covered separately by
+        the CLI profile's modification time.
+        """
         return {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
+            "client_id": os.environ.get("AZURE_CLIENT_ID"),
+            "tenant_id": os.environ.get("AZURE_TENANT_ID")
         }
     
+    def _load_cached_token(self) -> None:
+        """Load an access token persisted by a previous run, if still usable"""
+        try:
+            if self._token_cache_file.stat().st_mtime < _azure_profile_mtime():
+                # Signed in again since the token was cached
+                return
+            cached = orjson.loads(self._token_cache_file.read_bytes())
+        except (OSError, ValueError):
+            return
+        
+        # Ignore anything that doesn't look like a cache file we wrote
+        if not isinstance(cached, dict):
+            return
+        token = cached.get('token')
+        expires_on = cached.get('expires_on')
+        if not isinstance(token, str) or not token:
+            return
+        if isinstance(expires_on, bool) or not isinstance(expires_on, (int, float)):
+            return
+        
+        if cached.get('subscription_id') != self.subscription_id:
+            return
+        if cached.get('identity') != self._token_identity():
+            return
+        self.session.headers["Authorization"] = f"Bearer {token}"
+        self._token_expires_on = expires_on
+        self._token_credential = cached.get('credential')
+    
+    def _discard_cached_token(self) -> None:
+        """Forget the current token so the next request fetches a new one"""
+        self._token_expires_on = 0
+        try:
+            self._token_cache_file.unlink()
+        except OSError:
+            pass
+    
+    def _save_cached_token(self, token: str) -> None:
+        """Persist the access token so later runs can skip the credential"""
+        data = orjson.dumps({
+            "subscription_id": self.subscription_id,
+            "identity": self._token_identity(),
+            "credential": self._token_credential,
+            "token": token,
+            "expires_on": self._token_expires_on
+        })
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            # Owner-only permissions: the file holds a bearer token
+            fd = os.open(self._token_cache_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            # The mode above only applies when the file is created
+            os.chmod(self._token_cache_file, 0o600)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+        except OSError as e:
+            if self.verbose:
+                print(f"Could not cache access token: {str(e)}")
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> int:
+        """Seconds the server asked us to wait via Retry-After, 0 if none"""
+        try:
+            return int(response.headers.get('Retry-After', 0))
+        except ValueError:
+            return 0
+    
+    @classmethod
+    def _next_poll_delay(cls, response: requests.Response, current: float, max_interval: float) -> float:
+        """
+        Work out how long to wait before the next poll
+        
+        Honors the server's Retry-After header when present, otherwise backs
+        off exponentially from the previous delay.
+        
+        Args:
+            response: Response from the last poll
+            current: Delay used before the last poll
+            max_interval: Upper bound for the backoff delay
+            
+        Returns:
+            float: Seconds to sleep before polling again
+        """
+        return cls._retry_after(response) or min(max_interval, current * 1.5)
+    
     def get_subscription_info(self) -> Optional[Dict[str, Any]]:
         """
         Get subscription information
@@ -98,64 +315,57 @@ class AzureRestDeployer:
         Returns:
             Dict with subscription info or None if failed
         """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}?api-version={self.API_VERSION_RESOURCES}"
+        url = f"{self._base}{self._res_api}"
         
         try:
-            response = requests.get(url, headers=self._get_headers())
+            response = self._request('GET', url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
             print(f"{Colors.RED}✗ Failed to get subscription info: {str(e)}{Colors.NC}")
             return None
     
-    def check_resource_group_exists(self, resource_group_name: str) -> bool:
+    def ensure_resource_group(self, resource_group_name: str, location: str) -> Optional[bool]:
         """
-        Check if resource group exists
+        Make sure a resource group exists, creating it if needed
         
-        Args:
-            resource_group_name: Name of the resource group
-            
-        Returns:
-            bool: True if exists, False otherwise
-        """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resourcegroups/{resource_group_name}?api-version={self.API_VERSION_RESOURCES}"
-        
-        try:
-            response = requests.get(url, headers=self._get_headers())
-            return response.status_code == 200
-        except requests.exceptions.RequestException:
-            return False
-    
-    def create_resource_group(self, resource_group_name: str, location: str) -> bool:
-        """
-        Create a resource group using REST API
+        A blind PUT is not used for groups that already exist: ARM replaces
+        the group's tags on PUT and rejects it when the location differs.
         
         Args:
             resource_group_name: Name of the resource group
-            location: Azure region
+            location: Azure region used if the group has to be created
             
         Returns:
-            bool: True if successful, False otherwise
+            True if the group was created, False if it already existed,
+            None if it could not be checked or created
         """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resourcegroups/{resource_group_name}?api-version={self.API_VERSION_RESOURCES}"
-        
-        body = {
-            "location": location
-        }
+        url = f"{self._base}/resourcegroups/{resource_group_name}{self._res_api}"
         
         try:
-            response = requests.put(url, headers=self._get_headers(), json=body)
+            response = self._request('GET', url, timeout=self.REQUEST_TIMEOUT)
+            if response.status_code != 404:
+                response.raise_for_status()
+                return False
+            
+            response = self._request('PUT', url, data=orjson.dumps({"location": location}), timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
-            return True
+            return response.status_code == 201
         except requests.exceptions.RequestException as e:
-            print(f"{Colors.RED}✗ Failed to create resource group: {str(e)}{Colors.NC}")
-            if self.verbose and hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
-            return False
+            print(f"{Colors.RED}✗ Failed to ensure resource group: {str(e)}{Colors.NC}")
+            error_response = getattr(e, 'response', None)
+            if self.verbose and error_response is not None:
+                print(f"Response: {error_response.text}")
+            return None
     
     def compile_bicep(self, bicep_file: Path) -> Optional[Dict[str, Any]]:
         """
-        Compile BICEP file to ARM template using Azure CLI
+        Compile BICEP file to ARM template
+        
+        The compiled template is cached next to the BICEP file (main.bicep ->
+        main.json) and reused while it is newer than the BICEP file and every
+        module next to it in modules/. The standalone bicep binary is preferred over
+        'az bicep build', which has to start the whole Azure CLI first.
         
         Args:
             bicep_file: Path to BICEP file
@@ -163,33 +373,80 @@ class AzureRestDeployer:
         Returns:
             Dict with ARM template or None if failed
         """
+        precompiled = bicep_file.with_suffix(".json")
+        try:
+            sources = [bicep_file, *(bicep_file.parent / "modules").glob("*.bicep")]
+            source_mtime = max(f.stat().st_mtime for f in sources)
+            if precompiled.exists() and precompiled.stat().st_mtime >= source_mtime:
+                template = orjson.loads(precompiled.read_bytes())
+                print(f"{Colors.GREEN}✓ Using pre-compiled template: {precompiled}{Colors.NC}")
+                return template
+        except (OSError, ValueError):
+            # Unreadable sources or corrupt cache, fall through and rebuild
+            pass
+        
         print(f"{Colors.YELLOW}Building BICEP template...{Colors.NC}")
         
         try:
-            # Use Azure CLI to build bicep (most reliable method)
-            result = subprocess.run(
-                ["az", "bicep", "build", "--file", str(bicep_file), "--stdout"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
+            try:
+                result = subprocess.run(
+                    ["bicep", "build", "--stdout", str(bicep_file)],
+                    capture_output=True,
+                    check=True
+                )
+            except FileNotFoundError:
+                # No standalone bicep binary on PATH, use Azure CLI
+                result = subprocess.run(
+                    ["az", "bicep", "build", "--file", str(bicep_file), "--stdout"],
+                    capture_output=True,
+                    check=True
+                )
             
-            template = json.loads(result.stdout)
+            template = orjson.loads(result.stdout)
             print(f"{Colors.GREEN}✓ BICEP template built successfully{Colors.NC}")
+            
+            try:
+                precompiled.write_bytes(result.stdout)
+            except OSError as e:
+                if self.verbose:
+                    print(f"Could not cache compiled template: {str(e)}")
+            
             return template
             
         except subprocess.CalledProcessError as e:
             print(f"{Colors.RED}✗ Failed to build BICEP template{Colors.NC}")
-            print(f"Error: {e.stderr}")
+            print(f"Error: {e.stderr.decode(errors='replace')}")
             return None
         except Exception as e:
             print(f"{Colors.RED}✗ Failed to build BICEP template: {str(e)}{Colors.NC}")
             return None
     
+    @staticmethod
+    def _deployment_body(template: Union[bytes, Dict[str, Any]], parameters: Dict[str, Any]) -> bytes:
+        """
+        Build the JSON request body for a deployment
+        
+        The envelope is framed by hand around the template bytes so a template
+        that was serialized once can be reused without encoding it again.
+        
+        Args:
+            template: ARM template, or its pre-serialized JSON bytes
+            parameters: Deployment parameters
+            
+        Returns:
+            bytes: Serialized deployment request body
+        """
+        template_bytes = template if isinstance(template, bytes) else orjson.dumps(template)
+        return (
+            b'{"properties":{"template":' + template_bytes
+            + b',"parameters":' + orjson.dumps(parameters)
+            + b',"mode":"Incremental"}}'
+        )
+    
     def validate_deployment(
         self,
         resource_group_name: str,
-        template: Dict[str, Any],
+        template: Union[bytes, Dict[str, Any]],
         parameters: Dict[str, Any]
     ) -> bool:
         """
@@ -197,48 +454,44 @@ class AzureRestDeployer:
         
         Args:
             resource_group_name: Name of the resource group
-            template: ARM template
+            template: ARM template, or its pre-serialized JSON bytes
             parameters: Deployment parameters
             
         Returns:
             bool: True if validation successful, False otherwise
         """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/validation-{int(time.time())}/whatIf?api-version={self.API_VERSION_DEPLOYMENTS}"
+        url = f"{self._base}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/validation-{int(time.time())}/whatIf{self._dep_api}"
         
-        body = {
-            "properties": {
-                "template": template,
-                "parameters": parameters,
-                "mode": "Incremental"
-            }
-        }
+        body = self._deployment_body(template, parameters)
         
         try:
             print(f"{Colors.YELLOW}Running deployment validation (What-If)...{Colors.NC}")
-            response = requests.post(url, headers=self._get_headers(), json=body)
+            response = self._request('POST', url, data=body, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             
             # What-If API is async, so we may need to poll
             if response.status_code == 202:
                 location = response.headers.get('Location')
                 if location:
-                    result = self._poll_async_operation(location)
-                    if result:
+                    # The What-If result is only shown in verbose mode, so
+                    # don't parse it otherwise
+                    result = self._poll_async_operation(location, parse_result=self.verbose)
+                    if result is not None:
                         print(f"{Colors.GREEN}✓ Deployment validation successful{Colors.NC}")
                         if self.verbose:
-                            print(json.dumps(result, indent=2))
+                            print(_format_json(result))
                         return True
             else:
-                result = response.json()
                 print(f"{Colors.GREEN}✓ Deployment validation successful{Colors.NC}")
                 if self.verbose:
-                    print(json.dumps(result, indent=2))
+                    print(_format_json(response.json()))
                 return True
                 
         except requests.exceptions.RequestException as e:
             print(f"{Colors.RED}✗ Deployment validation failed: {str(e)}{Colors.NC}")
-            if self.verbose and hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
+            error_response = getattr(e, 'response', None)
+            if self.verbose and error_response is not None:
+                print(f"Response: {error_response.text}")
         
         return False
     
@@ -246,7 +499,7 @@ class AzureRestDeployer:
         self,
         resource_group_name: str,
         deployment_name: str,
-        template: Dict[str, Any],
+        template: Union[bytes, Dict[str, Any]],
         parameters: Dict[str, Any]
     ) -> Optional[Dict[str, Any]]:
         """
@@ -255,52 +508,156 @@ class AzureRestDeployer:
         Args:
             resource_group_name: Name of the resource group
             deployment_name: Name for the deployment
-            template: ARM template
+            template: ARM template, or its pre-serialized JSON bytes
             parameters: Deployment parameters
             
         Returns:
             Dict with deployment result or None if failed
         """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/{deployment_name}?api-version={self.API_VERSION_DEPLOYMENTS}"
+        print(f"{Colors.YELLOW}Starting deployment...{Colors.NC}")
+        print(f"{Colors.YELLOW}This may take several minutes...{Colors.NC}")
         
-        body = {
-            "properties": {
-                "template": template,
-                "parameters": parameters,
-                "mode": "Incremental"
-            }
-        }
+        if not self._start_deployment(resource_group_name, deployment_name, template, parameters):
+            return None
         
-        try:
-            print(f"{Colors.YELLOW}Starting deployment...{Colors.NC}")
-            print(f"{Colors.YELLOW}This may take several minutes...{Colors.NC}")
-            
-            response = requests.put(url, headers=self._get_headers(), json=body)
-            response.raise_for_status()
-            
-            # Deployment is async, poll for completion
-            result = self._poll_deployment(resource_group_name, deployment_name)
+        # Deployment is async, poll for completion
+        result = self._poll_deployment(resource_group_name, deployment_name)
+        
+        if result and result.get('properties', {}).get('provisioningState') == 'Succeeded':
+            print(f"\n{Colors.CYAN}====================================={Colors.NC}")
+            print(f"{Colors.GREEN}Deployment completed successfully!{Colors.NC}")
+            print(f"{Colors.CYAN}====================================={Colors.NC}\n")
+            return result
+        else:
+            print(f"{Colors.RED}✗ Deployment failed{Colors.NC}")
+            if result:
+                error = result.get('properties', {}).get('error', {})
+                if error:
+                    print(f"Error: {_format_json(error)}")
+            return None
+    
+    def deploy_templates(
+        self,
+        deployments: List[Tuple[str, str, Union[bytes, Dict[str, Any]], Dict[str, Any]]]
+    ) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        Run several deployments concurrently, e.g. a rollout to many resource groups
+        
+        All deployments are started first and then supervised by a single
+        poll loop on the calling thread, so no thread is needed per deployment.
+        
+        Args:
+            deployments: (resource group, deployment name, ARM template,
+                parameters) tuples
             
+        Returns:
+            Dict mapping (resource group, deployment name) to the deployment
+            result, or None for deployments that failed
+        """
+        results: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        started = []
+        
+        print(f"{Colors.YELLOW}Starting {len(deployments)} deployments...{Colors.NC}")
+        for resource_group_name, deployment_name, template, parameters in deployments:
+            if self._start_deployment(resource_group_name, deployment_name, template, parameters):
+                started.append((resource_group_name, deployment_name))
+            else:
+                results[(resource_group_name, deployment_name)] = None
+        
+        for key, result in self._poll_deployments(started).items():
+            resource_group_name, deployment_name = key
             if result and result.get('properties', {}).get('provisioningState') == 'Succeeded':
-                print(f"\n{Colors.CYAN}====================================={Colors.NC}")
-                print(f"{Colors.GREEN}Deployment completed successfully!{Colors.NC}")
-                print(f"{Colors.CYAN}====================================={Colors.NC}\n")
-                return result
+                print(f"{Colors.GREEN}✓ Deployment {deployment_name} in {resource_group_name} succeeded{Colors.NC}")
+                results[key] = result
             else:
-                print(f"{Colors.RED}✗ Deployment failed{Colors.NC}")
+                print(f"{Colors.RED}✗ Deployment {deployment_name} in {resource_group_name} failed{Colors.NC}")
                 if result:
                     error = result.get('properties', {}).get('error', {})
                     if error:
-                        print(f"Error: {json.dumps(error, indent=2)}")
-                return None
-                
+                        print(f"Error: {_format_json(error)}")
+                results[key] = None
+        
+        return results
+    
+    def _start_deployment(
+        self,
+        resource_group_name: str,
+        deployment_name: str,
+        template: Union[bytes, Dict[str, Any]],
+        parameters: Dict[str, Any]
+    ) -> bool:
+        """
+        Submit a deployment without waiting for it to finish
+        
+        Args:
+            resource_group_name: Name of the resource group
+            deployment_name: Name for the deployment
+            template: ARM template, or its pre-serialized JSON bytes
+            parameters: Deployment parameters
+            
+        Returns:
+            bool: True if ARM accepted the deployment, False otherwise
+        """
+        url = f"{self._base}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/{deployment_name}{self._dep_api}"
+        
+        body = self._deployment_body(template, parameters)
+        
+        try:
+            response = self._request('PUT', url, data=body, timeout=self.REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return True
         except requests.exceptions.RequestException as e:
             print(f"{Colors.RED}✗ Deployment failed: {str(e)}{Colors.NC}")
-            if self.verbose and hasattr(e, 'response') and e.response is not None:
-                print(f"Response: {e.response.text}")
-            return None
+            error_response = getattr(e, 'response', None)
+            if self.verbose and error_response is not None:
+                print(f"Response: {error_response.text}")
+            return False
     
-    def _poll_deployment(self, resource_group_name: str, deployment_name: str, timeout: int = 1800, poll_interval: int = 10) -> Optional[Dict[str, Any]]:
+    def deploy_templates_batched(
+        self,
+        resource_group_name: str,
+        deployment_name: str,
+        items: List[Tuple[str, Dict[str, Any], Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Deploy several ARM templates as a single deployment
+        
+        Each template becomes a nested Microsoft.Resources/deployments resource
+        of one parent template, so ARM receives one PUT and the result is
+        tracked by one poll loop instead of one per template. main.bicep
+        already does the same for its content modules.
+        
+        Args:
+            resource_group_name: Name of the resource group
+            deployment_name: Name for the parent deployment
+            items: (nested deployment name, ARM template, ARM parameters) tuples
+            
+        Returns:
+            Dict with deployment result or None if failed
+        """
+        template = {
+            "$schema": "https://schema.management.azure.com/schemas/2019-04-01/deploymentTemplate.json#",
+            "contentVersion": "1.0.0.0",
+            "resources": [
+                {
+                    "type": "Microsoft.Resources/deployments",
+                    "apiVersion": self.API_VERSION_DEPLOYMENTS,
+                    "name": name,
+                    "properties": {
+                        "mode": "Incremental",
+                        # Evaluate each template's own parameters and variables
+                        "expressionEvaluationOptions": {"scope": "inner"},
+                        "template": child_template,
+                        "parameters": child_parameters
+                    }
+                }
+                for name, child_template, child_parameters in items
+            ]
+        }
+        
+        return self.deploy_template(resource_group_name, deployment_name, template, {})
+    
+    def _poll_deployment(self, resource_group_name: str, deployment_name: str, timeout: int = 1800, max_interval: int = 15) -> Optional[Dict[str, Any]]:
         """
         Poll deployment status until completion
         
@@ -308,62 +665,116 @@ class AzureRestDeployer:
             resource_group_name: Name of the resource group
             deployment_name: Name of the deployment
             timeout: Timeout in seconds (default 1800 = 30 minutes)
-            poll_interval: Seconds between polling attempts (default 10)
+            max_interval: Maximum seconds between polling attempts (default 15)
             
         Returns:
             Dict with deployment result or None if failed
         """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/{deployment_name}?api-version={self.API_VERSION_DEPLOYMENTS}"
+        key = (resource_group_name, deployment_name)
+        return self._poll_deployments([key], timeout, max_interval)[key]
+    
+    def _poll_deployments(
+        self,
+        deployments: List[Tuple[str, str]],
+        timeout: int = 1800,
+        max_interval: int = 15
+    ) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        Poll the status of several deployments until all have completed
+        
+        Every pending deployment is checked once per round. The delay between
+        rounds follows DEPLOYMENT_POLL_SCHEDULE up to max_interval, or the
+        longest Retry-After any deployment returned if that is larger.
+        
+        Args:
+            deployments: (resource group, deployment name) tuples
+            timeout: Timeout in seconds (default 1800 = 30 minutes)
+            max_interval: Maximum scheduled seconds between polls (default 15)
+            
+        Returns:
+            Dict mapping each (resource group, deployment name) to its
+            deployment result, or None if polling failed or timed out
+        """
+        pending = {
+            (rg, name): f"{self._base}/resourcegroups/{rg}/providers/Microsoft.Resources/deployments/{name}{self._dep_api}"
+            for rg, name in deployments
+        }
+        results: Dict[Tuple[str, str], Optional[Dict[str, Any]]] = {}
+        last_status: Dict[Tuple[str, str], Optional[str]] = {}
         
         start_time = time.time()
-        last_status = None
+        schedule = itertools.chain(self.DEPLOYMENT_POLL_SCHEDULE, itertools.repeat(max_interval))
         
-        while time.time() - start_time < timeout:
-            try:
-                response = requests.get(url, headers=self._get_headers())
-                response.raise_for_status()
-                result = response.json()
-                
-                status = result.get('properties', {}).get('provisioningState')
-                
-                if status != last_status:
-                    print(f"{Colors.YELLOW}Deployment status: {status}{Colors.NC}")
-                    last_status = status
-                
-                if status in ['Succeeded', 'Failed', 'Canceled']:
-                    return result
-                
-                time.sleep(poll_interval)
-                
-            except requests.exceptions.RequestException as e:
-                print(f"{Colors.RED}✗ Failed to poll deployment status: {str(e)}{Colors.NC}")
-                return None
+        while pending and time.time() - start_time < timeout:
+            next_delay = min(max_interval, next(schedule))
+            
+            for key, url in list(pending.items()):
+                label = f" ({key[1]})" if len(deployments) > 1 else ""
+                try:
+                    response = self._request('GET', url, timeout=self.REQUEST_TIMEOUT)
+                    response.raise_for_status()
+                    result = response.json()
+                    
+                    status = result.get('properties', {}).get('provisioningState')
+                    
+                    if status != last_status.get(key):
+                        print(f"{Colors.YELLOW}Deployment status{label}: {status}{Colors.NC}")
+                        last_status[key] = status
+                    
+                    if status in TERMINAL_PROVISIONING_STATES:
+                        results[key] = result
+                        del pending[key]
+                        continue
+                    
+                    next_delay = max(next_delay, self._retry_after(response))
+                    
+                except requests.exceptions.RequestException as e:
+                    print(f"{Colors.RED}✗ Failed to poll deployment status{label}: {str(e)}{Colors.NC}")
+                    results[key] = None
+                    del pending[key]
+            
+            if pending:
+                time.sleep(next_delay)
         
-        print(f"{Colors.RED}✗ Deployment timed out after {timeout} seconds{Colors.NC}")
-        return None
+        for key in pending:
+            label = f" ({key[1]})" if len(deployments) > 1 else ""
+            print(f"{Colors.RED}✗ Deployment{label} timed out after {timeout} seconds{Colors.NC}")
+            results[key] = None
+        
+        return results
     
-    def _poll_async_operation(self, location_url: str, timeout: int = 300, poll_interval: int = 5) -> Optional[Dict[str, Any]]:
+    def _poll_async_operation(
+        self,
+        location_url: str,
+        timeout: int = 300,
+        max_interval: int = 30,
+        parse_result: bool = True
+    ) -> Optional[Union[bytes, Dict[str, Any]]]:
         """
         Poll async operation until completion
         
         Args:
             location_url: URL to poll
             timeout: Timeout in seconds (default 300 = 5 minutes)
-            poll_interval: Seconds between polling attempts (default 5)
+            max_interval: Maximum seconds between polling attempts (default 30)
+            parse_result: Parse the result body as JSON (default True); when
+                False the raw body bytes are returned
             
         Returns:
-            Dict with operation result or None if failed
+            Dict (or bytes) with operation result or None if failed
         """
         start_time = time.time()
+        delay = 2
         
         while time.time() - start_time < timeout:
             try:
-                response = requests.get(location_url, headers=self._get_headers())
+                response = self._request('GET', location_url, timeout=self.REQUEST_TIMEOUT)
                 
                 if response.status_code == 200:
-                    return response.json()
+                    return response.json() if parse_result else response.content
                 elif response.status_code == 202:
-                    time.sleep(poll_interval)
+                    delay = self._next_poll_delay(response, delay, max_interval)
+                    time.sleep(delay)
                 else:
                     return None
                     
@@ -383,10 +794,10 @@ class AzureRestDeployer:
         Returns:
             Dict with outputs or None if failed
         """
-        url = f"https://management.azure.com/subscriptions/{self.subscription_id}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/{deployment_name}?api-version={self.API_VERSION_DEPLOYMENTS}"
+        url = f"{self._base}/resourcegroups/{resource_group_name}/providers/Microsoft.Resources/deployments/{deployment_name}{self._dep_api}"
         
         try:
-            response = requests.get(url, headers=self._get_headers())
+            response = self._request('GET', url, timeout=self.REQUEST_TIMEOUT)
             response.raise_for_status()
             result = response.json()
             return result.get('properties', {}).get('outputs', {})
@@ -395,10 +806,55 @@ class AzureRestDeployer:
             return None
 
 
+def get_default_subscription() -> Optional[str]:
+    """
+    Get the default subscription ID from Azure CLI
+    
+    The result of 'az account show' is cached for 24 hours. The cache is
+    discarded early when the Azure CLI profile changes (e.g. after 'az login'
+    or 'az account set'), so it always follows the CLI's current selection.
+    
+    Returns:
+        Subscription ID or None if failed
+    """
+    cache_file = CACHE_DIR / "subscription"
+    
+    try:
+        cache_mtime = cache_file.stat().st_mtime
+        if time.time() - cache_mtime < SUBSCRIPTION_CACHE_TTL and cache_mtime >= _azure_profile_mtime():
+            subscription_id = cache_file.read_text().strip()
+            if subscription_id:
+                return subscription_id
+    except OSError:
+        pass
+    
+    try:
+        result = subprocess.run(
+            ["az", "account", "show", "--query", "id", "-o", "tsv"],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+    except subprocess.CalledProcessError:
+        return None
+    
+    subscription_id = result.stdout.strip()
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(subscription_id)
+    except OSError:
+        pass
+    return subscription_id
+
+
 def load_parameters(parameter_file: Path) -> Optional[Dict[str, Any]]:
     """
     Load parameters from JSON file
     
+    ARM parameter files are streamed so only each parameter's value is kept,
+    without holding the raw file and the full parsed wrapper at once. The
+    result is checked against PARAMS_SCHEMA when one is set.
+    
     Args:
         parameter_file: Path to parameters file
         
@@ -406,14 +862,23 @@ def load_parameters(parameter_file: Path) -> Optional[Dict[str, Any]]:
         Dict with parameters or None if failed
     """
     try:
-        with open(parameter_file, 'r') as f:
-            params = json.load(f)
-        
         # Convert from ARM parameter file format to deployment format
-        if 'parameters' in params:
-            return {k: v.get('value') for k, v in params['parameters'].items()}
-        else:
-            return params
+        with open(parameter_file, 'rb') as f:
+            parameters = {k: v.get('value') for k, v in ijson.kvitems(f, 'parameters', use_float=True)}
+        
+        if not parameters:
+            # No ARM-format parameters found: either an ARM file with an empty
+            # parameters object or a file already in deployment format
+            with open(parameter_file, 'rb') as f:
+                params = orjson.loads(f.read())
+            if 'parameters' in params:
+                parameters = {k: v.get('value') for k, v in params['parameters'].items()}
+            else:
+                parameters = params
+        
+        if _validate_parameters is not None:
+            _validate_parameters(parameters)
+        return parameters
             
     except Exception as e:
         print(f"{Colors.RED}✗ Failed to load parameters: {str(e)}{Colors.NC}")
@@ -441,7 +906,7 @@ Examples:
     parser.add_argument('-p', '--parameter-file', default='parameters.json',
                         help='Path to parameter file (default: parameters.json)')
     parser.add_argument('-s', '--subscription-id',
-                        help='Azure subscription ID (will use default if not provided)')
+                        help='Azure subscription ID (defaults to $AZURE_SUBSCRIPTION_ID, then the Azure CLI default)')
     parser.add_argument('-w', '--what-if', action='store_true',
                         help='Run in what-if mode (preview changes)')
     parser.add_argument('-v', '--verbose', action='store_true',
@@ -454,21 +919,14 @@ Examples:
     print(f"{Colors.CYAN}====================================={Colors.NC}\n")
     
     # Get subscription ID
-    subscription_id = args.subscription_id
+    subscription_id = args.subscription_id or os.environ.get("AZURE_SUBSCRIPTION_ID")
     if not subscription_id:
         print(f"{Colors.YELLOW}Getting default subscription...{Colors.NC}")
-        try:
-            result = subprocess.run(
-                ["az", "account", "show", "--query", "id", "-o", "tsv"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            subscription_id = result.stdout.strip()
-            print(f"{Colors.GREEN}✓ Using subscription: {subscription_id}{Colors.NC}")
-        except subprocess.CalledProcessError:
+        subscription_id = get_default_subscription()
+        if not subscription_id:
             print(f"{Colors.RED}✗ Failed to get subscription ID. Please specify with -s or run 'az login'{Colors.NC}")
             return 1
+        print(f"{Colors.GREEN}✓ Using subscription: {subscription_id}{Colors.NC}")
     
     # Initialize deployer
     deployer = AzureRestDeployer(subscription_id, verbose=args.verbose)
@@ -477,11 +935,6 @@ Examples:
     if not deployer.authenticate():
         return 1
     
-    # Get subscription info
-    sub_info = deployer.get_subscription_info()
-    if sub_info:
-        print(f"{Colors.GREEN}✓ Subscription: {sub_info.get('displayName', 'Unknown')} ({subscription_id}){Colors.NC}")
-    
     # Verify parameter file exists
     parameter_file = Path(args.parameter_file)
     if not parameter_file.exists():
@@ -497,42 +950,56 @@ Examples:
     # Convert parameters to ARM format
     arm_parameters = {k: {"value": v} for k, v in parameters.items()}
     
-    # Check resource group
-    print(f"\n{Colors.YELLOW}Checking resource group...{Colors.NC}")
-    if not deployer.check_resource_group_exists(args.resource_group):
-        print(f"{Colors.YELLOW}Creating resource group: {args.resource_group} in {args.location}{Colors.NC}")
-        if not deployer.create_resource_group(args.resource_group, args.location):
-            return 1
-        print(f"{Colors.GREEN}✓ Resource group created{Colors.NC}")
-    else:
-        print(f"{Colors.GREEN}✓ Resource group exists: {args.resource_group}{Colors.NC}")
-    
-    # Compile BICEP template
+    # Verify BICEP file exists
     bicep_file = Path(__file__).parent / "main.bicep"
     if not bicep_file.exists():
         print(f"{Colors.RED}✗ BICEP file not found: {bicep_file}{Colors.NC}")
         return 1
     
-    template = deployer.compile_bicep(bicep_file)
-    if template is None:
+    # Run independent preflight steps concurrently: the REST calls overlap
+    # with the BICEP build subprocess
+    print(f"{Colors.YELLOW}Checking resource group...{Colors.NC}")
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        sub_info_future = executor.submit(deployer.get_subscription_info)
+        rg_created_future = executor.submit(deployer.ensure_resource_group, args.resource_group, args.location)
+        template_future = executor.submit(deployer.compile_bicep, bicep_file)
+        
+        # Get subscription info
+        sub_info = sub_info_future.result()
+        if sub_info:
+            print(f"{Colors.GREEN}✓ Subscription: {sub_info.get('displayName', 'Unknown')} ({subscription_id}){Colors.NC}")
+        
+        # Check resource group
+        rg_created = rg_created_future.result()
+        if rg_created:
+            print(f"{Colors.GREEN}✓ Resource group created: {args.resource_group} in {args.location}{Colors.NC}")
+        elif rg_created is not None:
+            print(f"{Colors.GREEN}✓ Resource group exists: {args.resource_group}{Colors.NC}")
+        
+        template = template_future.result()
+    
+    if rg_created is None or template is None:
         return 1
     
+    # Serialize the template once; it is reused as-is in the request body
+    template_bytes = orjson.dumps(template)
+    
     # What-if mode or actual deployment
     if args.what_if:
-        deployer.validate_deployment(args.resource_group, template, arm_parameters)
+        deployer.validate_deployment(args.resource_group, template_bytes, arm_parameters)
     else:
         # Deploy
         deployment_name = f"sentinel-deployment-{int(time.time())}"
         result = deployer.deploy_template(
             args.resource_group,
             deployment_name,
-            template,
+            template_bytes,
             arm_parameters
         )
         
         if result:
-            # Show outputs
-            outputs = deployer.get_deployment_outputs(args.resource_group, deployment_name)
+            # Show outputs; the final poll response already includes them
+            outputs = result.get('properties', {}).get('outputs', {})
             if outputs:
                 print(f"{Colors.CYAN}Deployment outputs:{Colors.NC}")
                 for key, value in outputs.items():